@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -5,9 +6,11 @@ from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_read_db
 from models import User
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,9 +19,49 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Optionally cache authenticated users by email so requests skip the users lookup.
+# Off by default: a cached user is up to this many seconds stale.
+PRINCIPAL_CACHE_SECONDS = float(os.getenv("PRINCIPAL_CACHE_SECONDS", "0"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+# Users preloaded at startup stay cached this long, so the preload outlives the first minute
+PRINCIPAL_PRELOAD_SECONDS = float(os.getenv("PRINCIPAL_PRELOAD_SECONDS", "900"))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+_principals = OrderedDict()  # email -> (expires_at, detached User)
+_principals_lock = threading.Lock()
+
+def cache_principal(db: Session, user: User, ttl_seconds: Optional[float] = None):
+    # Detach the user so a commit in this request's session cannot expire it
+    db.expunge(user)
+    if ttl_seconds is None:
+        ttl_seconds = PRINCIPAL_CACHE_SECONDS
+    with _principals_lock:
+        _principals[user.email] = (time.monotonic() + ttl_seconds, user)
+        _principals.move_to_end(user.email)
+        while len(_principals) > PRINCIPAL_CACHE_SIZE:
+            _principals.popitem(last=False)
+
+def cached_principal(email: str) -> Optional[User]:
+    with _principals_lock:
+        entry = _principals.get(email)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del _principals[email]
+            return None
+        return user
+
+def preload_principals(db: Session, limit: int) -> int:
+    """Warm the principal cache with the most recently created users."""
+    users = db.query(User).order_by(User.created_at.desc()).limit(limit).all()
+    for user in users:
+        cache_principal(db, user, PRINCIPAL_PRELOAD_SECONDS)
+    return len(users)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -36,29 +79,49 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
+def decode_token_subject(token: str) -> Optional[str]:
+    """Return the email a token was issued for, or None if it is invalid."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+def _current_user(credentials: HTTPAuthorizationCredentials, db: Session):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+    email = decode_token_subject(credentials.credentials)
+    if email is None:
         raise credentials_exception
     
+    user = cached_principal(email)
+    if user is not None:
+        return user
+    
     user = db.query(User).filter(User.email == email).first()
     if user is None:
         raise credentials_exception
+    if PRINCIPAL_CACHE_SECONDS > 0:
+        cache_principal(db, user)
     return user
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    return _current_user(credentials, db)
+
+# For read-only routes: looks the user up in the same replica session the route reads from
+async def get_current_user_read(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db)
+):
+    return _current_user(credentials, db)
+
 def authenticate_user(db: Session, email: str, password: str):
     user = db.query(User).filter(User.email == email).first()
     if not user:
@@ -0,0 +1,117 @@
+"""Measure how long a worker takes from process start until it can serve.
+
+Each worker is a fresh interpreter that imports main and runs the app's
+lifespan startup, like uvicorn does. The previous startup path ran
+Base.metadata.create_all while main was imported. The "create_all" mode
+approximates it by importing the current main and then running
+create_all. The import step is therefore identical in both modes and the
+comparison isolates the schema step. It is not the baseline import path:
+the old main imported fewer modules and created fewer tables.
+
+create_all checks every table, and on PostgreSQL every enum type,
+with a separate query. The lifespan check needs two. The difference
+grows with the round-trip time to the database, so --latency-ms adds a
+delay to every statement through a before_cursor_execute hook. Use it
+to model a remote database when only a local one is available.
+
+    python bench_startup.py
+    python bench_startup.py --workers 4 --runs 5 --latency-ms 0 5 20
+
+The database must already be migrated (`alembic upgrade head`).
+"""
+from statistics import median
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+WORKER = """
+import asyncio, json, os, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+from sqlalchemy import event
+latency = float(os.environ.get("BENCH_LATENCY_MS", "0")) / 1000
+round_trips = 0
+
+@event.listens_for(main.engine, "before_cursor_execute")
+def simulate_round_trip(*args):
+    global round_trips
+    round_trips += 1
+    if latency:
+        time.sleep(latency)
+
+{startup}
+ready = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "ready_ms": (ready - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "round_trips": round_trips,
+}}))
+"""
+
+LIFESPAN_STARTUP = """
+async def startup():
+    async with main.lifespan(main.app):
+        pass
+
+asyncio.run(startup())"""
+
+MODES = {
+    "lifespan": WORKER.format(startup=LIFESPAN_STARTUP),
+    "create_all": WORKER.format(startup="main.Base.metadata.create_all(bind=main.engine)"),
+}
+
+def run_workers(source: str, workers: int, latency_ms: float):
+    """Start `workers` interpreters at once; return wall time and per-worker timings."""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, BENCH_LATENCY_MS=str(latency_ms))
+    started = time.perf_counter()
+    processes = [
+        subprocess.Popen([sys.executable, "-c", source], cwd=backend_dir, env=env, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    results = []
+    for process in processes:
+        output, _ = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError("Worker failed to start")
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    wall_ms = (time.perf_counter() - started) * 1000
+    return wall_ms, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API worker startup")
+    parser.add_argument("--workers", type=int, default=4, help="Workers started concurrently per run")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[0.0], help="Delay added to every statement")
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':<12}{'latency ms':>12}{'queries':>9}{'import ms':>11}{'startup ms':>12}"
+        f"{'ready ms':>10}{'1 worker ms':>13}{f'{args.workers} workers ms':>16}"
+    )
+    for latency_ms in args.latency_ms:
+        for mode, source in MODES.items():
+            single, multi, imports, startups, ready = [], [], [], [], []
+            for _ in range(args.runs):
+                wall_ms, results = run_workers(source, 1, latency_ms)
+                single.append(wall_ms)
+                imports.append(results[0]["import_ms"])
+                startups.append(results[0]["startup_ms"])
+                ready.append(results[0]["ready_ms"])
+                round_trips = results[0]["round_trips"]
+                wall_ms, _ = run_workers(source, args.workers, latency_ms)
+                multi.append(wall_ms)
+
+            print(
+                f"{mode:<12}{latency_ms:>12.0f}{round_trips:>9}{median(imports):>11.1f}{median(startups):>12.1f}"
+                f"{median(ready):>10.1f}{median(single):>13.1f}{median(multi):>16.1f}"
+            )
+
+if __name__ == "__main__":
+    main()
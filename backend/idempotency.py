@@ -0,0 +1,188 @@
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from dotenv import load_dotenv
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from database import get_async_redis
+
+load_dotenv()
+
+IDEMPOTENCY_BACKEND = os.getenv("IDEMPOTENCY_BACKEND", "memory")  # memory or redis
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+
+# How long a duplicate waits for another worker to finish the original request
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+
+# Lifetime of the cross-worker lock; must exceed the slowest request, or a duplicate may run
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "300"))
+
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = "Idempotent-Replayed"
+
+class MemoryStore:
+    """Bounded LRU of completed responses with per-entry expiry."""
+
+    def __init__(self, max_keys: int, ttl_seconds: int):
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, record)
+        self._claims = {}  # key -> token of the request executing it
+        self._lock = threading.Lock()
+
+    async def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, record = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return record
+
+    async def set(self, key: str, record: dict):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, record)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    async def claim(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._claims:
+                return None
+            token = uuid.uuid4().hex
+            self._claims[key] = token
+            return token
+
+    async def release(self, key: str, token: str):
+        with self._lock:
+            if self._claims.get(key) == token:
+                del self._claims[key]
+
+# Delete the lock only if it still holds our token, not one taken over after it expired
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+class RedisStore:
+    """Completed responses in Redis, shared by all workers; Redis expires them."""
+
+    def __init__(self, ttl_seconds: int, lock_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self._release = None
+
+    async def get(self, key: str):
+        value = await get_async_redis().get(f"idempotency:{key}")
+        return json.loads(value) if value else None
+
+    async def set(self, key: str, record: dict):
+        await get_async_redis().set(f"idempotency:{key}", json.dumps(record), ex=self.ttl_seconds)
+
+    async def claim(self, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        claimed = await get_async_redis().set(f"idempotency-lock:{key}", token, nx=True, ex=self.lock_seconds)
+        return token if claimed else None
+
+    async def release(self, key: str, token: str):
+        if self._release is None:
+            self._release = get_async_redis().register_script(RELEASE_SCRIPT)
+        await self._release(keys=[f"idempotency-lock:{key}"], args=[token])
+
+if IDEMPOTENCY_BACKEND == "redis":
+    store = RedisStore(IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_LOCK_SECONDS)
+else:
+    store = MemoryStore(IDEMPOTENCY_MAX_KEYS, IDEMPOTENCY_TTL_SECONDS)
+
+def fingerprint(*parts: Any) -> str:
+    """Hash of the request payload, so a key cannot be reused for a different request."""
+    payload = json.dumps(jsonable_encoder(parts), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _replay(record: dict, request_fingerprint: str, response: Response):
+    if record["fingerprint"] != request_fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used with a different request"
+        )
+    response.headers[REPLAY_HEADER] = "true"
+    return record["response"]
+
+async def _wait_for_other_worker(key: str):
+    """Wait for the request holding `key` to finish; return its record or our own claim token."""
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        record = await store.get(key)
+        if record is not None:
+            return record, None
+        token = await store.claim(key)
+        if token is not None:
+            # The lock is free: the original failed, or finished after our get
+            return None, token
+    raise HTTPException(
+        status_code=409,
+        detail="A request with this Idempotency-Key is still being processed"
+    )
+
+async def run(
+    idempotency_key: Optional[str],
+    scope: str,
+    request_fingerprint: str,
+    response: Response,
+    handler: Callable[[], Any]
+):
+    """Run `handler` at most once per (scope, Idempotency-Key).
+
+    Replays are answered from the store; duplicates that arrive while the
+    original is still running wait for its result instead of executing.
+    Failed requests are not stored, so the client can retry them.
+    """
+    if not idempotency_key:
+        return handler()
+
+    if len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+
+    key = f"{scope}:{idempotency_key}"
+
+    record = await store.get(key)
+    if record is not None:
+        return _replay(record, request_fingerprint, response)
+
+    token = await store.claim(key)
+    if token is None:
+        record, token = await _wait_for_other_worker(key)
+        if record is not None:
+            return _replay(record, request_fingerprint, response)
+
+    # The original may have stored its response and released the lock
+    # between our last get and the claim; it must not run a second time
+    record = await store.get(key)
+    if record is not None:
+        await store.release(key, token)
+        return _replay(record, request_fingerprint, response)
+
+    try:
+        record = {
+            "fingerprint": request_fingerprint,
+            "response": jsonable_encoder(handler())
+        }
+        await store.set(key, record)
+        return record["response"]
+    finally:
+        await store.release(key, token)
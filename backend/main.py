@@ -1,43 +1,92 @@
-from fastapi import FastAPI, Depends, HTTPException, status, BackgroundTasks
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, BackgroundTasks, Query, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from typing import List
+from contextlib import asynccontextmanager
+from typing import List, Optional
 import json
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import logging
+import time
 import uuid
 
-from database import get_db, engine
+from database import get_db, get_read_db, engine, replica_engines, SessionLocal, check_schema_version, warm_pool
 from models import *
-from schemas import *
-from auth import get_password_hash, verify_password, create_access_token, get_current_user, authenticate_user
+# Response schemas share names with the models, so they are referenced through the module
+import schemas
+from schemas import Token, UserCreate, UserLogin, HubCreate, TeamCreate, MessageCreate, MeetingCreate, HubStats, HubPresence
+from auth import get_password_hash, verify_password, create_access_token, get_current_user, get_current_user_read, authenticate_user, preload_principals
+import idempotency
+import presence
+from ratelimit import RateLimitMiddleware
+import stats
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Meeting Buddy API", version="1.0.0", description="Backend for Meeting Buddy Application")
-
-# CORS middleware
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Startup options; the schema itself is managed with `alembic upgrade head`
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "1") == "1"
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "0"))  # connections to open per engine
+PRINCIPAL_PRELOAD = int(os.getenv("PRINCIPAL_PRELOAD", "0"))  # users to cache before serving
+
+router = APIRouter()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    
+    if SCHEMA_CHECK:
+        check_schema_version()
+    
+    if DB_POOL_WARMUP > 0:
+        warm_pool(DB_POOL_WARMUP)
+    
+    if PRINCIPAL_PRELOAD > 0:
+        db = SessionLocal()
+        try:
+            preload_principals(db, PRINCIPAL_PRELOAD)
+        finally:
+            db.close()
+    
+    logger.info("Startup finished in %.1f ms", (time.perf_counter() - started) * 1000)
+    yield
+    for target in [engine] + replica_engines:
+        target.dispose()
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="Meeting Buddy API",
+        version="1.0.0",
+        description="Backend for Meeting Buddy Application",
+        lifespan=lifespan
+    )
+    
+    # Rate limiting and admission control (added first so CORS headers wrap its 429/503 responses)
+    app.add_middleware(RateLimitMiddleware)
+    
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    app.include_router(router)
+    return app
 
 # Root endpoint
-@app.get("/")
+@router.get("/")
 async def root():
     return {"message": "Meeting Buddy API", "status": "running"}
 
 # Authentication endpoints
-@app.post("/auth/register", response_model=Token)
+@router.post("/auth/register", response_model=Token)
 async def register(user: UserCreate, db: Session = Depends(get_db)):
     # Check if user already exists
     db_user = db.query(User).filter(User.email == user.email).first()
@@ -72,7 +121,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         "user": db_user
     }
 
-@app.post("/auth/login", response_model=Token)
+@router.post("/auth/login", response_model=Token)
 async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     user = authenticate_user(db, user_credentials.email, user_credentials.password)
     if not user:
@@ -94,70 +143,85 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     }
 
 # User endpoints
-@app.get("/users/me", response_model=User)
-async def read_users_me(current_user: User = Depends(get_current_user)):
+@router.get("/users/me", response_model=schemas.User)
+async def read_users_me(current_user: User = Depends(get_current_user_read)):
     return current_user
 
 # Hub endpoints
-@app.post("/hubs", response_model=Hub)
-async def create_hub(hub: HubCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    # Create hub
-    db_hub = Hub(
-        name=hub.name,
-        type=hub.type,
-        creator_id=current_user.id
-    )
-    
-    db.add(db_hub)
-    db.commit()
-    db.refresh(db_hub)
-    
-    # Add creator as member
-    creator_member = db.query(User).filter(User.email == hub.creator).first()
-    if creator_member:
-        # Add creator to hub_members table with appropriate role
-        db.execute(
-            hub_members.insert().values(
-                hub_id=db_hub.id,
-                user_id=creator_member.id,
-                role=UserRole.CEO  # Default creator role
-            )
+@router.post("/hubs", response_model=schemas.Hub)
+async def create_hub(
+    hub: HubCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    def execute():
+        # Create hub
+        db_hub = Hub(
+            name=hub.name,
+            type=hub.type,
+            creator_id=current_user.id
         )
-    
-    # Add other members
-    for member_data in hub.members:
-        member_user = db.query(User).filter(User.email == member_data.email).first()
-        if member_user:
+        
+        db.add(db_hub)
+        db.commit()
+        db.refresh(db_hub)
+        
+        # Add creator as member
+        creator_member = db.query(User).filter(User.email == hub.creator).first()
+        if creator_member:
+            # Add creator to hub_members table with appropriate role
             db.execute(
                 hub_members.insert().values(
                     hub_id=db_hub.id,
-                    user_id=member_user.id,
-                    role=member_data.role
+                    user_id=creator_member.id,
+                    role=UserRole.CEO  # Default creator role
                 )
             )
-    
-    # Create default "All Members" channel
-    all_members_channel = Channel(
-        name="All Members",
-        type=ChannelType.ALL_MEMBERS,
-        hub_id=db_hub.id
+        
+        # Add other members
+        for member_data in hub.members:
+            member_user = db.query(User).filter(User.email == member_data.email).first()
+            if member_user:
+                db.execute(
+                    hub_members.insert().values(
+                        hub_id=db_hub.id,
+                        user_id=member_user.id,
+                        role=member_data.role
+                    )
+                )
+        
+        # Create default "All Members" channel
+        all_members_channel = Channel(
+            name="All Members",
+            type=ChannelType.ALL_MEMBERS,
+            hub_id=db_hub.id
+        )
+        db.add(all_members_channel)
+        
+        db.commit()
+        
+        # Return hub with members
+        return get_hub_response(db_hub, db)
+    
+    return await idempotency.run(
+        idempotency_key,
+        f"{current_user.id}:create_hub",
+        idempotency.fingerprint(hub),
+        response,
+        execute
     )
-    db.add(all_members_channel)
-    
-    db.commit()
-    
-    # Return hub with members
-    return get_hub_response(db_hub, db)
 
-@app.get("/hubs", response_model=List[Hub])
-async def get_user_hubs(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.get("/hubs", response_model=List[schemas.Hub])
+async def get_user_hubs(current_user: User = Depends(get_current_user_read), db: Session = Depends(get_read_db)):
     # Get hubs where user is a member
     hubs = db.query(Hub).join(hub_members).filter(hub_members.c.user_id == current_user.id).all()
     
     return [get_hub_response(hub, db) for hub in hubs]
 
-@app.get("/hubs/{hub_id}", response_model=Hub)
-async def get_hub(hub_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.get("/hubs/{hub_id}", response_model=schemas.Hub)
+async def get_hub(hub_id: str, current_user: User = Depends(get_current_user_read), db: Session = Depends(get_read_db)):
     # Check if user is member of the hub
     hub = db.query(Hub).join(hub_members).filter(
         Hub.id == hub_id,
@@ -170,102 +234,127 @@ async def get_hub(hub_id: str, current_user: User = Depends(get_current_user), d
     return get_hub_response(hub, db)
 
 # Team endpoints
-@app.post("/hubs/{hub_id}/teams", response_model=Team)
+@router.post("/hubs/{hub_id}/teams", response_model=schemas.Team)
 async def create_team(
     hub_id: str, 
     team: TeamCreate, 
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user), 
     db: Session = Depends(get_db)
 ):
-    # Verify user is member of hub
-    hub_member = db.query(hub_members).filter(
-        hub_members.c.hub_id == hub_id,
-        hub_members.c.user_id == current_user.id
-    ).first()
-    
-    if not hub_member:
-        raise HTTPException(status_code=403, detail="Not authorized to create teams in this hub")
-    
-    # Create team
-    db_team = Team(
-        name=team.name,
-        description=team.description,
-        department=team.department,
-        hub_id=hub_id,
-        leader_id=team.leader,
-        assistant_id=team.assistant
-    )
-    
-    db.add(db_team)
-    db.commit()
-    db.refresh(db_team)
-    
-    # Add team members
-    for member_id in team.members:
-        db.execute(
-            team_members.insert().values(
-                team_id=db_team.id,
-                user_id=member_id
+    def execute():
+        # Verify user is member of hub
+        hub_member = db.query(hub_members).filter(
+            hub_members.c.hub_id == hub_id,
+            hub_members.c.user_id == current_user.id
+        ).first()
+        
+        if not hub_member:
+            raise HTTPException(status_code=403, detail="Not authorized to create teams in this hub")
+        
+        # Create team
+        db_team = Team(
+            name=team.name,
+            description=team.description,
+            department=team.department,
+            hub_id=hub_id,
+            leader_id=team.leader,
+            assistant_id=team.assistant
+        )
+        
+        db.add(db_team)
+        db.commit()
+        db.refresh(db_team)
+        
+        # Add team members
+        for member_id in team.members:
+            db.execute(
+                team_members.insert().values(
+                    team_id=db_team.id,
+                    user_id=member_id
+                )
             )
+        
+        # Create team channel
+        team_channel = Channel(
+            name=team.name,
+            type=ChannelType.TEAM,
+            hub_id=hub_id,
+            team_id=db_team.id
         )
-    
-    # Create team channel
-    team_channel = Channel(
-        name=team.name,
-        type=ChannelType.TEAM,
-        hub_id=hub_id,
-        team_id=db_team.id
+        db.add(team_channel)
+        db.commit()
+        db.refresh(team_channel)
+        
+        # Update team with channel_id
+        db_team.channel_id = team_channel.id
+        db.commit()
+        
+        return get_team_response(db_team, db)
+    
+    return await idempotency.run(
+        idempotency_key,
+        f"{current_user.id}:create_team",
+        idempotency.fingerprint(hub_id, team),
+        response,
+        execute
     )
-    db.add(team_channel)
-    db.commit()
-    db.refresh(team_channel)
-    
-    # Update team with channel_id
-    db_team.channel_id = team_channel.id
-    db.commit()
-    
-    return get_team_response(db_team, db)
 
 # Message endpoints
-@app.post("/channels/{channel_id}/messages", response_model=Message)
+@router.post("/channels/{channel_id}/messages", response_model=schemas.Message)
 async def send_message(
     channel_id: str,
     message: MessageCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Verify user has access to channel
-    channel = db.query(Channel).filter(Channel.id == channel_id).first()
-    if not channel:
-        raise HTTPException(status_code=404, detail="Channel not found")
-    
-    # Check if user is member of the hub
-    hub_member = db.query(hub_members).filter(
-        hub_members.c.hub_id == channel.hub_id,
-        hub_members.c.user_id == current_user.id
-    ).first()
-    
-    if not hub_member:
-        raise HTTPException(status_code=403, detail="Not authorized to send messages in this channel")
-    
-    # Create message
-    db_message = Message(
-        content=message.content,
-        channel_id=channel_id,
-        sender_id=current_user.id
+    def execute():
+        # Verify user has access to channel
+        channel = db.query(Channel).filter(Channel.id == channel_id).first()
+        if not channel:
+            raise HTTPException(status_code=404, detail="Channel not found")
+        
+        # Check if user is member of the hub
+        hub_member = db.query(hub_members).filter(
+            hub_members.c.hub_id == channel.hub_id,
+            hub_members.c.user_id == current_user.id
+        ).first()
+        
+        if not hub_member:
+            raise HTTPException(status_code=403, detail="Not authorized to send messages in this channel")
+        
+        # Create message
+        db_message = Message(
+            content=message.content,
+            channel_id=channel_id,
+            sender_id=current_user.id
+        )
+        
+        db.add(db_message)
+        # Bucket on the stored timestamp, which is what the backfill reads
+        db.flush()
+        stats.record_message(db, channel.hub_id, channel_id, current_user.id, db_message.created_at)
+        db.commit()
+        db.refresh(db_message)
+        
+        return get_message_response(db_message, db)
+    
+    return await idempotency.run(
+        idempotency_key,
+        f"{current_user.id}:send_message",
+        idempotency.fingerprint(channel_id, message),
+        response,
+        execute
     )
-    
-    db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
-    
-    return get_message_response(db_message, db)
 
-@app.get("/channels/{channel_id}/messages", response_model=List[Message])
+@router.get("/channels/{channel_id}/messages", response_model=List[schemas.Message])
 async def get_messages(
     channel_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
 ):
     # Verify access
     channel = db.query(Channel).filter(Channel.id == channel_id).first()
@@ -285,51 +374,119 @@ async def get_messages(
     return [get_message_response(msg, db) for msg in messages]
 
 # Meeting endpoints
-@app.post("/hubs/{hub_id}/meetings", response_model=Meeting)
+@router.post("/hubs/{hub_id}/meetings", response_model=schemas.Meeting)
 async def create_meeting(
     hub_id: str,
     meeting: MeetingCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Create meeting
-    db_meeting = Meeting(
-        title=meeting.title,
-        agenda=json.dumps(meeting.agenda),
-        scheduled_at=meeting.scheduledFor,
-        duration=meeting.duration,
-        jitsi_link=f"https://meet.jit.si/AIMeetingBuddy{str(uuid.uuid4())[:8]}",
-        hub_id=hub_id,
-        creator_id=current_user.id
-    )
-    
-    db.add(db_meeting)
-    db.commit()
-    db.refresh(db_meeting)
-    
-    # Add participants
-    for participant_id in meeting.participants:
-        db.execute(
-            meeting_participants.insert().values(
-                meeting_id=db_meeting.id,
-                user_id=participant_id
-            )
+    def execute():
+        # Store UTC; SQLite drops the offset and would keep the client's wall time
+        scheduled_at = stats.as_utc(meeting.scheduledFor)
+        
+        # Create meeting
+        db_meeting = Meeting(
+            title=meeting.title,
+            agenda=json.dumps(meeting.agenda),
+            scheduled_at=scheduled_at,
+            duration=meeting.duration,
+            jitsi_link=f"https://meet.jit.si/AIMeetingBuddy{str(uuid.uuid4())[:8]}",
+            hub_id=hub_id,
+            creator_id=current_user.id
         )
-    
-    db.commit()
-    
-    return get_meeting_response(db_meeting, db)
+        
+        db.add(db_meeting)
+        stats.record_meeting(db, hub_id, scheduled_at, meeting.duration)
+        db.commit()
+        db.refresh(db_meeting)
+        
+        # Add participants
+        for participant_id in meeting.participants:
+            db.execute(
+                meeting_participants.insert().values(
+                    meeting_id=db_meeting.id,
+                    user_id=participant_id
+                )
+            )
+        
+        db.commit()
+        
+        return get_meeting_response(db_meeting, db)
+    
+    return await idempotency.run(
+        idempotency_key,
+        f"{current_user.id}:create_meeting",
+        idempotency.fingerprint(hub_id, meeting),
+        response,
+        execute
+    )
 
-@app.get("/hubs/{hub_id}/meetings", response_model=List[Meeting])
+@router.get("/hubs/{hub_id}/meetings", response_model=List[schemas.Meeting])
 async def get_hub_meetings(
     hub_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
 ):
     meetings = db.query(Meeting).filter(Meeting.hub_id == hub_id).all()
     return [get_meeting_response(meeting, db) for meeting in meetings]
 
+# Stats endpoints
+@router.get("/hubs/{hub_id}/stats", response_model=HubStats)
+async def get_hub_stats(
+    hub_id: str,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    hub_member = db.query(hub_members).filter(
+        hub_members.c.hub_id == hub_id,
+        hub_members.c.user_id == current_user.id
+    ).first()
+    
+    if not hub_member:
+        raise HTTPException(status_code=404, detail="Hub not found")
+    
+    try:
+        start, end = stats.resolve_range(from_date, to_date)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    
+    return stats.query_hub_stats(db, hub_id, start, end)
+
+# Presence endpoints
+@router.post("/hubs/{hub_id}/presence/heartbeat", response_model=HubPresence)
+async def presence_heartbeat(
+    hub_id: str,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    verify_hub_presence_access(hub_id, current_user.id, db)
+    await presence.tracker.heartbeat(hub_id, current_user.id)
+    return await presence.hub_presence(hub_id)
+
+@router.get("/hubs/{hub_id}/presence", response_model=HubPresence)
+async def get_hub_presence(
+    hub_id: str,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    verify_hub_presence_access(hub_id, current_user.id, db)
+    return await presence.hub_presence(hub_id)
+
 # Helper functions
+def verify_hub_presence_access(hub_id: str, user_id: str, db: Session):
+    hub_member = db.query(hub_members).filter(
+        hub_members.c.hub_id == hub_id,
+        hub_members.c.user_id == user_id
+    ).first()
+    
+    if not hub_member:
+        raise HTTPException(status_code=404, detail="Hub not found")
+
 def get_hub_response(hub: Hub, db: Session):
     # Get members with roles
     members_query = db.query(User, hub_members.c.role, hub_members.c.joined_at).join(
@@ -413,6 +570,8 @@ def get_meeting_response(meeting: Meeting, db: Session):
         "summary": None
     }
 
+app = create_app()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""activity rollups
+
+Per-day rollup tables behind GET /hubs/{hub_id}/stats. They start empty;
+run `python stats.py backfill` after upgrading to fill them from the
+existing messages and meetings.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 02:48:53.120337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('channel_daily_activity',
+    sa.Column('hub_id', sa.String(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('channel_id', sa.String(), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['channel_id'], ['channels.id'], ),
+    sa.ForeignKeyConstraint(['hub_id'], ['hubs.id'], ),
+    sa.PrimaryKeyConstraint('hub_id', 'day', 'channel_id')
+    )
+    op.create_table('hub_daily_active_members',
+    sa.Column('hub_id', sa.String(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['hub_id'], ['hubs.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('hub_id', 'day', 'user_id')
+    )
+    op.create_table('hub_daily_meetings',
+    sa.Column('hub_id', sa.String(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('meeting_count', sa.Integer(), nullable=False),
+    sa.Column('total_minutes', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['hub_id'], ['hubs.id'], ),
+    sa.PrimaryKeyConstraint('hub_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('hub_daily_meetings')
+    op.drop_table('hub_daily_active_members')
+    op.drop_table('channel_daily_activity')
@@ -0,0 +1,67 @@
+"""hot path indexes
+
+Indexes for the filter and join columns used by the API:
+
+- hub_members.user_id: hubs of a user (GET /hubs)
+- team_members.user_id, meeting_participants.user_id: the user side of
+  the association tables; the primary keys only cover the other column
+- channels.hub_id, teams.hub_id, meetings.hub_id: hub contents
+- messages (channel_id, created_at): channel history in timestamp order
+
+The ix_<table>_id indexes duplicated the primary keys and only added
+write cost, so they are dropped. On PostgreSQL the new indexes are built
+concurrently so writes are not blocked while they build.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 02:48:54.465015
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NEW_INDEXES = [
+    ('ix_hub_members_user_id', 'hub_members', ['user_id']),
+    ('ix_team_members_user_id', 'team_members', ['user_id']),
+    ('ix_meeting_participants_user_id', 'meeting_participants', ['user_id']),
+    ('ix_channels_hub_id', 'channels', ['hub_id']),
+    ('ix_teams_hub_id', 'teams', ['hub_id']),
+    ('ix_meetings_hub_id', 'meetings', ['hub_id']),
+    ('ix_messages_channel_id_created_at', 'messages', ['channel_id', 'created_at']),
+]
+
+REDUNDANT_PK_INDEXES = [
+    ('ix_users_id', 'users'),
+    ('ix_hubs_id', 'hubs'),
+    ('ix_teams_id', 'teams'),
+    ('ix_channels_id', 'channels'),
+    ('ix_messages_id', 'messages'),
+    ('ix_meetings_id', 'meetings'),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in NEW_INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+    for name, table in REDUNDANT_PK_INDEXES:
+        op.drop_index(name, table_name=table)
+
+
+def downgrade() -> None:
+    for name, table in REDUNDANT_PK_INDEXES:
+        op.create_index(name, table, ['id'], unique=False)
+
+    for name, table, columns in reversed(NEW_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum as SQLEnum, Table
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, Text, ForeignKey, Enum as SQLEnum, Table, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -29,7 +29,7 @@ hub_members = Table(
     'hub_members',
     Base.metadata,
     Column('hub_id', String, ForeignKey('hubs.id'), primary_key=True),
-    Column('user_id', String, ForeignKey('users.id'), primary_key=True),
+    Column('user_id', String, ForeignKey('users.id'), primary_key=True, index=True),
     Column('role', SQLEnum(UserRole), nullable=False),
     Column('joined_at', DateTime(timezone=True), server_default=func.now())
 )
@@ -38,7 +38,7 @@ team_members = Table(
     'team_members',
     Base.metadata,
     Column('team_id', String, ForeignKey('teams.id'), primary_key=True),
-    Column('user_id', String, ForeignKey('users.id'), primary_key=True),
+    Column('user_id', String, ForeignKey('users.id'), primary_key=True, index=True),
     Column('joined_at', DateTime(timezone=True), server_default=func.now())
 )
 
@@ -46,13 +46,13 @@ meeting_participants = Table(
     'meeting_participants',
     Base.metadata,
     Column('meeting_id', String, ForeignKey('meetings.id'), primary_key=True),
-    Column('user_id', String, ForeignKey('users.id'), primary_key=True)
+    Column('user_id', String, ForeignKey('users.id'), primary_key=True, index=True)
 )
 
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     name = Column(String, nullable=False)
@@ -76,7 +76,7 @@ class User(Base):
 class Hub(Base):
     __tablename__ = "hubs"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False)
     type = Column(SQLEnum(HubType), nullable=False)
     description = Column(Text, nullable=True)
@@ -94,11 +94,11 @@ class Hub(Base):
 class Team(Base):
     __tablename__ = "teams"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     department = Column(String, nullable=False)
-    hub_id = Column(String, ForeignKey("hubs.id"), nullable=False)
+    hub_id = Column(String, ForeignKey("hubs.id"), nullable=False, index=True)
     leader_id = Column(String, ForeignKey("users.id"), nullable=False)
     assistant_id = Column(String, ForeignKey("users.id"), nullable=True)
     channel_id = Column(String, nullable=True)  # Will be set when channel is created
@@ -114,10 +114,10 @@ class Team(Base):
 class Channel(Base):
     __tablename__ = "channels"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False)
     type = Column(SQLEnum(ChannelType), nullable=False)
-    hub_id = Column(String, ForeignKey("hubs.id"), nullable=False)
+    hub_id = Column(String, ForeignKey("hubs.id"), nullable=False, index=True)
     team_id = Column(String, ForeignKey("teams.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
@@ -128,8 +128,12 @@ class Channel(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Channel history is always read in timestamp order
+        Index("ix_messages_channel_id_created_at", "channel_id", "created_at"),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     content = Column(Text, nullable=False)
     channel_id = Column(String, ForeignKey("channels.id"), nullable=False)
     sender_id = Column(String, ForeignKey("users.id"), nullable=False)
@@ -143,14 +147,14 @@ class Message(Base):
 class Meeting(Base):
     __tablename__ = "meetings"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     agenda = Column(Text, nullable=True)  # JSON string of agenda items
     scheduled_at = Column(DateTime(timezone=True), nullable=False)
     duration = Column(Integer, nullable=False)  # in minutes
     jitsi_link = Column(String, nullable=True)
-    hub_id = Column(String, ForeignKey("hubs.id"), nullable=False)
+    hub_id = Column(String, ForeignKey("hubs.id"), nullable=False, index=True)
     creator_id = Column(String, ForeignKey("users.id"), nullable=False)
     status = Column(String, default="scheduled")  # scheduled, active, completed
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -158,4 +162,30 @@ class Meeting(Base):
     # Relationships
     hub = relationship("Hub", back_populates="meetings")
     creator = relationship("User", back_populates="created_meetings")
-    participants = relationship("User", secondary=meeting_participants, back_populates="meetings")
\ No newline at end of file
+    participants = relationship("User", secondary=meeting_participants, back_populates="meetings")
+
+# Activity rollups, maintained incrementally by stats.py on every write.
+# Keys lead with (hub_id, day) so a stats query only touches the requested range.
+class ChannelDailyActivity(Base):
+    __tablename__ = "channel_daily_activity"
+    
+    hub_id = Column(String, ForeignKey("hubs.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    channel_id = Column(String, ForeignKey("channels.id"), primary_key=True)
+    message_count = Column(Integer, nullable=False, default=0)
+
+class HubDailyActiveMember(Base):
+    __tablename__ = "hub_daily_active_members"
+    
+    hub_id = Column(String, ForeignKey("hubs.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    message_count = Column(Integer, nullable=False, default=0)
+
+class HubDailyMeetings(Base):
+    __tablename__ = "hub_daily_meetings"
+    
+    hub_id = Column(String, ForeignKey("hubs.id"), primary_key=True)
+    day = Column(Date, primary_key=True)  # scheduled day of the meeting
+    meeting_count = Column(Integer, nullable=False, default=0)
+    total_minutes = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,117 @@
+from typing import Callable, List
+from dotenv import load_dotenv
+import math
+import os
+import threading
+import time
+
+from database import get_async_redis
+
+load_dotenv()
+
+PRESENCE_BACKEND = os.getenv("PRESENCE_BACKEND", "memory")  # memory or redis
+
+# A member counts as online for this long after their last heartbeat
+PRESENCE_TTL_SECONDS = float(os.getenv("PRESENCE_TTL_SECONDS", "60"))
+
+# Expiry granularity of the in-memory timing wheel
+PRESENCE_TICK_SECONDS = float(os.getenv("PRESENCE_TICK_SECONDS", "1"))
+
+class MemoryPresence:
+    """Online members per hub, expired by a timing wheel.
+
+    Each (hub, user) sits in the wheel slot of the tick it expires on, so
+    advancing the clock only visits the slots that have passed and the
+    entries in them. Counts are the size of the hub's set. Members stay
+    online for at least the TTL and at most one tick longer.
+    """
+
+    def __init__(self, ttl_seconds: float, tick_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.tick_seconds = tick_seconds
+        self.ttl_ticks = max(1, math.ceil(ttl_seconds / tick_seconds))
+        self._clock = clock
+        # Rounding up puts expiry ticks up to ttl_ticks + 1 ahead of the current one
+        self._slots = [set() for _ in range(self.ttl_ticks + 2)]
+        self._online = {}  # hub_id -> {user_id: expiry tick}
+        self._current_tick = int(clock() / tick_seconds)
+        self._lock = threading.Lock()
+
+    def _advance(self, now: float):
+        now_tick = int(now / self.tick_seconds)
+        # After a long idle period every slot has expired; visit each once
+        passed = min(now_tick - self._current_tick, len(self._slots))
+        for offset in range(1, passed + 1):
+            slot = self._slots[(self._current_tick + offset) % len(self._slots)]
+            for hub_id, user_id in slot:
+                members = self._online[hub_id]
+                del members[user_id]
+                if not members:
+                    del self._online[hub_id]
+            slot.clear()
+        self._current_tick = max(self._current_tick, now_tick)
+
+    async def heartbeat(self, hub_id: str, user_id: str):
+        now = self._clock()
+        with self._lock:
+            self._advance(now)
+            members = self._online.setdefault(hub_id, {})
+            previous_tick = members.get(user_id)
+            if previous_tick is not None:
+                self._slots[previous_tick % len(self._slots)].discard((hub_id, user_id))
+            # Round up so a member never expires before the full TTL has passed
+            expires_tick = math.ceil((now + self.ttl_seconds) / self.tick_seconds)
+            members[user_id] = expires_tick
+            self._slots[expires_tick % len(self._slots)].add((hub_id, user_id))
+
+    async def online(self, hub_id: str) -> List[str]:
+        with self._lock:
+            self._advance(self._clock())
+            return list(self._online.get(hub_id, {}))
+
+    async def count(self, hub_id: str) -> int:
+        with self._lock:
+            self._advance(self._clock())
+            return len(self._online.get(hub_id, {}))
+
+class RedisPresence:
+    """Online members per hub in a Redis sorted set scored by expiry, shared by all workers."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+
+    def _expire(self, pipe, key: str):
+        pipe.zremrangebyscore(key, "-inf", time.time())
+
+    async def heartbeat(self, hub_id: str, user_id: str):
+        key = f"presence:{hub_id}"
+        pipe = get_async_redis().pipeline()
+        pipe.zadd(key, {user_id: time.time() + self.ttl_seconds})
+        pipe.expire(key, math.ceil(self.ttl_seconds))
+        await pipe.execute()
+
+    async def online(self, hub_id: str) -> List[str]:
+        key = f"presence:{hub_id}"
+        pipe = get_async_redis().pipeline()
+        self._expire(pipe, key)
+        pipe.zrange(key, 0, -1)
+        return (await pipe.execute())[-1]
+
+    async def count(self, hub_id: str) -> int:
+        key = f"presence:{hub_id}"
+        pipe = get_async_redis().pipeline()
+        self._expire(pipe, key)
+        pipe.zcard(key)
+        return (await pipe.execute())[-1]
+
+if PRESENCE_BACKEND == "redis":
+    tracker = RedisPresence(PRESENCE_TTL_SECONDS)
+else:
+    tracker = MemoryPresence(PRESENCE_TTL_SECONDS, PRESENCE_TICK_SECONDS)
+
+async def hub_presence(hub_id: str):
+    return {
+        "hubId": hub_id,
+        "online": await tracker.online(hub_id),
+        "count": await tracker.count(hub_id)
+    }
@@ -0,0 +1,168 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+from starlette.routing import Match
+from dotenv import load_dotenv
+import asyncio
+import json
+import math
+import os
+import time
+
+from auth import decode_token_subject
+from database import get_async_redis
+
+load_dotenv()
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory or redis
+
+# Token bucket per (user, route); /auth/* is limited per client IP instead
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "120"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "30"))
+AUTH_RATE_LIMIT_PER_MINUTE = float(os.getenv("AUTH_RATE_LIMIT_PER_MINUTE", "10"))
+AUTH_RATE_LIMIT_BURST = float(os.getenv("AUTH_RATE_LIMIT_BURST", "5"))
+
+# Upper bound on buckets kept in memory; the least recently used are dropped first
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "100000"))
+
+# Admission control: requests beyond MAX_IN_FLIGHT queue, beyond MAX_QUEUED they are shed
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "64"))
+MAX_QUEUED = int(os.getenv("MAX_QUEUED", "128"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("QUEUE_TIMEOUT_SECONDS", "5"))
+
+class MemoryBuckets:
+    """Token buckets stored as (tokens, updated_at) tuples in a bounded LRU."""
+
+    def __init__(self, max_buckets: int):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+# Refill and take atomically on the Redis server, using its clock for every worker
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or burst
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - updated_at) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+class RedisBuckets:
+    """Token buckets shared by all workers."""
+
+    def __init__(self):
+        self._take = None
+
+    async def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        if self._take is None:
+            self._take = get_async_redis().register_script(TAKE_SCRIPT)
+        allowed, tokens = await self._take(keys=[f"ratelimit:{key}"], args=[rate, burst])
+        if allowed:
+            return True, 0.0
+        return False, (1 - float(tokens)) / rate
+
+def _route_name(scope) -> str:
+    for route in scope["app"].routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "*"
+
+def _client_ip(scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else ""
+
+def _principal(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer":
+                return decode_token_subject(token)
+    return None
+
+async def _send_error(send, status_code: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class RateLimitMiddleware:
+    """Per-user token buckets plus a global cap on in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+        self.buckets = RedisBuckets() if RATE_LIMIT_BACKEND == "redis" else MemoryBuckets(RATE_LIMIT_MAX_BUCKETS)
+        self.slots = asyncio.Semaphore(MAX_IN_FLIGHT)
+        self.queued = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path.startswith("/auth/"):
+            key = f"ip:{_client_ip(scope)}|{path}"
+            rate, burst = AUTH_RATE_LIMIT_PER_MINUTE / 60, AUTH_RATE_LIMIT_BURST
+        else:
+            principal = _principal(scope)
+            subject = f"user:{principal}" if principal else f"ip:{_client_ip(scope)}"
+            key = f"{subject}|{scope['method']} {_route_name(scope)}"
+            rate, burst = RATE_LIMIT_PER_MINUTE / 60, RATE_LIMIT_BURST
+
+        allowed, retry_after = await self.buckets.take(key, rate, burst)
+        if not allowed:
+            await _send_error(send, 429, "Too many requests", retry_after)
+            return
+
+        if self.slots.locked():
+            if self.queued >= MAX_QUEUED:
+                await _send_error(send, 503, "Server is overloaded", 1)
+                return
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self.slots.acquire(), QUEUE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                await _send_error(send, 503, "Server is overloaded", QUEUE_TIMEOUT_SECONDS)
+                return
+            finally:
+                self.queued -= 1
+        else:
+            await self.slots.acquire()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.slots.release()
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 from models import UserRole, HubType, ChannelType
 
 # User Schemas
@@ -137,4 +137,35 @@ class Meeting(BaseModel):
     summary: Optional[str] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Hub Stats Schemas
+class ChannelDayStats(BaseModel):
+    channelId: str
+    day: date
+    messages: int
+
+class HubDayStats(BaseModel):
+    day: date
+    messages: int
+    activeMembers: int
+
+class MeetingWeekStats(BaseModel):
+    weekStart: date
+    meetings: int
+    minutes: int
+
+class HubStats(BaseModel):
+    hubId: str
+    from_: date = Field(alias="from")
+    to: date
+    activeMembers: int
+    channels: List[ChannelDayStats] = []
+    days: List[HubDayStats] = []
+    meetingsByWeek: List[MeetingWeekStats] = []
+
+# Presence Schemas
+class HubPresence(BaseModel):
+    hubId: str
+    online: List[str] = []
+    count: int
@@ -7,5 +7,8 @@ echo Setting up PostgreSQL database...
 echo Please ensure PostgreSQL is installed and running
 echo Create database: CREATE DATABASE meeting_buddy;
 
+echo Running database migrations...
+alembic upgrade head
+
 echo Starting FastAPI server...
 uvicorn main:app --reload --host 0.0.0.0 --port 8000
\ No newline at end of file
@@ -9,8 +9,9 @@ echo "Setting up PostgreSQL database..."
 echo "Please ensure PostgreSQL is installed and running"
 echo "Create database: CREATE DATABASE meeting_buddy;"
 
-# Run database migrations (if using Alembic)
-# alembic upgrade head
+# Run database migrations
+echo "Running database migrations..."
+alembic upgrade head
 
 # Start the FastAPI server
 echo "Starting FastAPI server..."
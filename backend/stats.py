@@ -0,0 +1,222 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+import argparse
+
+from sqlalchemy import Date, cast, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import (
+    Channel,
+    ChannelDailyActivity,
+    Hub,
+    HubDailyActiveMember,
+    HubDailyMeetings,
+    Meeting,
+    Message,
+)
+
+MAX_RANGE_DAYS = 366
+DEFAULT_RANGE_DAYS = 30
+
+ROLLUP_MODELS = (ChannelDailyActivity, HubDailyActiveMember, HubDailyMeetings)
+
+def _upsert(db: Session, model, keys: dict, increments: dict):
+    """Add `increments` to the rollup row identified by `keys`, creating it if needed."""
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = dialect_insert(table).values(**keys, **increments)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={column: table.c[column] + value for column, value in increments.items()}
+        )
+        db.execute(stmt)
+        return
+
+    # Generic fallback for dialects without ON CONFLICT support
+    row = db.get(model, tuple(keys.values()))
+    if row is None:
+        db.add(model(**keys, **increments))
+    else:
+        for column, value in increments.items():
+            setattr(row, column, getattr(row, column) + value)
+
+def as_utc(value: datetime) -> datetime:
+    """Convert an aware datetime to UTC; naive values are already taken to be UTC."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc)
+    return value
+
+def record_message(db: Session, hub_id: str, channel_id: str, user_id: str, at: Optional[datetime] = None):
+    """Count a new message in the rollups. Runs inside the caller's transaction.
+
+    Pass the stored `created_at` as `at` so the day matches the backfill.
+    """
+    day = as_utc(at or datetime.utcnow()).date()
+    _upsert(
+        db, ChannelDailyActivity,
+        {"hub_id": hub_id, "day": day, "channel_id": channel_id},
+        {"message_count": 1}
+    )
+    _upsert(
+        db, HubDailyActiveMember,
+        {"hub_id": hub_id, "day": day, "user_id": user_id},
+        {"message_count": 1}
+    )
+
+def record_meeting(db: Session, hub_id: str, scheduled_at: datetime, duration: int):
+    """Count a new meeting in the rollups. Runs inside the caller's transaction."""
+    _upsert(
+        db, HubDailyMeetings,
+        {"hub_id": hub_id, "day": as_utc(scheduled_at).date()},
+        {"meeting_count": 1, "total_minutes": duration}
+    )
+
+def _utc_day(db: Session, column):
+    # Incremental updates bucket by UTC day, so the backfill has to as well
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.timezone("UTC", column), Date)
+    return func.date(column)
+
+def backfill(db: Session, hub_id: str):
+    """Rebuild all rollups of one hub from `messages` and `meetings`."""
+    for model in ROLLUP_MODELS:
+        db.execute(delete(model).where(model.hub_id == hub_id))
+
+    message_day = _utc_day(db, Message.created_at).label("day")
+    db.execute(
+        insert(ChannelDailyActivity).from_select(
+            ["hub_id", "day", "channel_id", "message_count"],
+            select(Channel.hub_id, message_day, Message.channel_id, func.count())
+            .join(Channel, Channel.id == Message.channel_id)
+            .where(Channel.hub_id == hub_id)
+            .group_by(Channel.hub_id, message_day, Message.channel_id)
+        )
+    )
+    db.execute(
+        insert(HubDailyActiveMember).from_select(
+            ["hub_id", "day", "user_id", "message_count"],
+            select(Channel.hub_id, message_day, Message.sender_id, func.count())
+            .join(Channel, Channel.id == Message.channel_id)
+            .where(Channel.hub_id == hub_id)
+            .group_by(Channel.hub_id, message_day, Message.sender_id)
+        )
+    )
+
+    meeting_day = _utc_day(db, Meeting.scheduled_at).label("day")
+    db.execute(
+        insert(HubDailyMeetings).from_select(
+            ["hub_id", "day", "meeting_count", "total_minutes"],
+            select(Meeting.hub_id, meeting_day, func.count(), func.sum(Meeting.duration))
+            .where(Meeting.hub_id == hub_id)
+            .group_by(Meeting.hub_id, meeting_day)
+        )
+    )
+
+def backfill_all(db: Session, hub_id: Optional[str] = None) -> int:
+    """Rebuild rollups hub by hub, committing after each so transactions stay small."""
+    if hub_id:
+        hub_ids = [hub_id]
+    else:
+        hub_ids = [row.id for row in db.query(Hub.id).order_by(Hub.id)]
+
+    for current_hub_id in hub_ids:
+        backfill(db, current_hub_id)
+        db.commit()
+
+    return len(hub_ids)
+
+def resolve_range(start: Optional[date], end: Optional[date]):
+    """Apply defaults to a requested [start, end] range and validate it."""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+
+    if start > end:
+        raise ValueError("'from' must not be after 'to'")
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise ValueError(f"Range must not exceed {MAX_RANGE_DAYS} days")
+
+    return start, end
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+def query_hub_stats(db: Session, hub_id: str, start: date, end: date):
+    """Read activity for [start, end] from the rollups only; cost scales with the range."""
+    channel_rows = db.query(
+        ChannelDailyActivity.channel_id,
+        ChannelDailyActivity.day,
+        ChannelDailyActivity.message_count
+    ).filter(
+        ChannelDailyActivity.hub_id == hub_id,
+        ChannelDailyActivity.day.between(start, end)
+    ).order_by(ChannelDailyActivity.day, ChannelDailyActivity.channel_id).all()
+
+    member_rows = db.query(
+        HubDailyActiveMember.day,
+        HubDailyActiveMember.user_id
+    ).filter(
+        HubDailyActiveMember.hub_id == hub_id,
+        HubDailyActiveMember.day.between(start, end)
+    ).all()
+
+    meeting_rows = db.query(
+        HubDailyMeetings.day,
+        HubDailyMeetings.meeting_count,
+        HubDailyMeetings.total_minutes
+    ).filter(
+        HubDailyMeetings.hub_id == hub_id,
+        HubDailyMeetings.day.between(start, end)
+    ).all()
+
+    days = {}
+    for channel_id, day, message_count in channel_rows:
+        days.setdefault(day, {"messages": 0, "members": set()})["messages"] += message_count
+
+    active_members = set()
+    for day, user_id in member_rows:
+        days.setdefault(day, {"messages": 0, "members": set()})["members"].add(user_id)
+        active_members.add(user_id)
+
+    weeks = {}
+    for day, meeting_count, total_minutes in meeting_rows:
+        week = weeks.setdefault(_week_start(day), {"meetings": 0, "minutes": 0})
+        week["meetings"] += meeting_count
+        week["minutes"] += total_minutes
+
+    return {
+        "hubId": hub_id,
+        "from": start,
+        "to": end,
+        "activeMembers": len(active_members),
+        "channels": [
+            {"channelId": channel_id, "day": day, "messages": message_count}
+            for channel_id, day, message_count in channel_rows
+        ],
+        "days": [
+            {"day": day, "messages": data["messages"], "activeMembers": len(data["members"])}
+            for day, data in sorted(days.items())
+        ],
+        "meetingsByWeek": [
+            {"weekStart": week_start, "meetings": data["meetings"], "minutes": data["minutes"]}
+            for week_start, data in sorted(weeks.items())
+        ]
+    }
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild hub activity rollups")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--hub", dest="hub_id", help="Only rebuild this hub")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        count = backfill_all(db, args.hub_id)
+        print(f"Rebuilt rollups for {count} hub(s)")
+    finally:
+        db.close()
@@ -0,0 +1,135 @@
+"""Shared fixtures: a migrated, seeded scratch database and a client for the real app.
+
+The database is a temporary SQLite file unless QUERY_PLAN_DATABASE_URL
+points at an empty, disposable PostgreSQL database. It has to be chosen
+before `database` is imported, since the engine is created at import.
+"""
+from datetime import datetime, timedelta
+import os
+import tempfile
+import uuid
+
+os.environ["DATABASE_URL"] = os.getenv("QUERY_PLAN_DATABASE_URL") or (
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+)
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["PRINCIPAL_CACHE_SECONDS"] = "0"  # the default; test_auth.py turns the cache on
+os.environ["RATE_LIMIT_BURST"] = "100000"
+os.environ["AUTH_RATE_LIMIT_BURST"] = "100000"
+os.environ["IDEMPOTENCY_BACKEND"] = "memory"
+os.environ["PRESENCE_BACKEND"] = "memory"
+
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+import pytest
+
+from auth import create_access_token
+from database import SessionLocal, engine
+from models import (
+    Channel,
+    ChannelType,
+    Hub,
+    HubType,
+    Meeting,
+    Message,
+    Team,
+    User,
+    UserRole,
+    hub_members,
+    meeting_participants,
+    team_members,
+)
+import main
+import stats
+
+USERS = 200
+HUBS = 20
+MEMBERS_PER_HUB = 40
+TEAMS_PER_HUB = 3
+MESSAGES_PER_CHANNEL = 50
+MEETINGS_PER_HUB = 10
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _id():
+    return str(uuid.uuid4())
+
+def migrate(url: str):
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+
+def seed():
+    users = [{"id": _id(), "email": f"user{i}@example.com", "hashed_password": "x", "name": f"User {i}", "is_active": True} for i in range(USERS)]
+    hubs, members, teams, memberships, channels, messages, meetings, participants = [], [], [], [], [], [], [], []
+    now = datetime.utcnow()
+
+    for h in range(HUBS):
+        hub_id = _id()
+        hub_users = [users[(h * 7 + i) % USERS] for i in range(MEMBERS_PER_HUB)]
+        hubs.append({"id": hub_id, "name": f"Hub {h}", "type": HubType.TEAM.name, "creator_id": hub_users[0]["id"]})
+        members += [{"hub_id": hub_id, "user_id": user["id"], "role": UserRole.EMPLOYEE.name} for user in hub_users]
+
+        hub_channels = [{"id": _id(), "name": "All Members", "type": ChannelType.ALL_MEMBERS.name, "hub_id": hub_id, "team_id": None}]
+        for t in range(TEAMS_PER_HUB):
+            team_id = _id()
+            teams.append({"id": team_id, "name": f"Team {t}", "department": "Eng", "hub_id": hub_id, "leader_id": hub_users[t]["id"]})
+            memberships += [{"team_id": team_id, "user_id": user["id"]} for user in hub_users[t::TEAMS_PER_HUB]]
+            hub_channels.append({"id": _id(), "name": f"Team {t}", "type": ChannelType.TEAM.name, "hub_id": hub_id, "team_id": team_id})
+        channels += hub_channels
+
+        for channel in hub_channels:
+            messages += [
+                {"id": _id(), "content": "hello", "channel_id": channel["id"], "sender_id": hub_users[m % MEMBERS_PER_HUB]["id"], "created_at": now - timedelta(hours=m)}
+                for m in range(MESSAGES_PER_CHANNEL)
+            ]
+
+        for m in range(MEETINGS_PER_HUB):
+            meeting_id = _id()
+            meetings.append({"id": meeting_id, "title": f"Meeting {m}", "scheduled_at": now + timedelta(days=m), "duration": 30, "jitsi_link": f"https://meet.jit.si/Seed{m}", "hub_id": hub_id, "creator_id": hub_users[0]["id"]})
+            participants += [{"meeting_id": meeting_id, "user_id": user["id"]} for user in hub_users[:5]]
+
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert(), users)
+        connection.execute(Hub.__table__.insert(), hubs)
+        connection.execute(hub_members.insert(), members)
+        connection.execute(Team.__table__.insert(), teams)
+        connection.execute(team_members.insert(), memberships)
+        connection.execute(Channel.__table__.insert(), channels)
+        connection.execute(Message.__table__.insert(), messages)
+        connection.execute(Meeting.__table__.insert(), meetings)
+        connection.execute(meeting_participants.insert(), participants)
+
+    db = SessionLocal()
+    try:
+        stats.backfill_all(db)
+    finally:
+        db.close()
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+
+    # users[0] and users[1] are both members of the first hub
+    return {
+        "user_id": users[0]["id"],
+        "email": users[0]["email"],
+        "other_user_id": users[1]["id"],
+        "other_email": users[1]["email"],
+        "hub_id": hubs[0]["id"],
+        "channel_id": channels[0]["id"],
+    }
+
+@pytest.fixture(scope="session")
+def ctx():
+    migrate(os.environ["DATABASE_URL"])
+    return seed()
+
+@pytest.fixture(scope="session")
+def client(ctx):
+    # Entering the client runs the lifespan, including the schema version check
+    with TestClient(main.app) as test_client:
+        token = create_access_token(data={"sub": ctx["email"]})
+        test_client.headers["Authorization"] = f"Bearer {token}"
+        yield test_client
@@ -0,0 +1,66 @@
+"""Principal cache and startup preload on the authentication path."""
+import time
+
+from sqlalchemy import event
+import pytest
+
+from auth import create_access_token, preload_principals
+from database import SessionLocal, engine
+import auth
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    auth._principals.clear()
+    yield
+    auth._principals.clear()
+
+@pytest.fixture
+def user_lookups():
+    lookups = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if "WHERE users.email" in statement:
+            lookups.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield lookups
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def _me(client, email):
+    response = client.get("/users/me", headers={"Authorization": f"Bearer {create_access_token(data={'sub': email})}"})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_cache_is_off_by_default(client, ctx, user_lookups):
+    _me(client, ctx["email"])
+    _me(client, ctx["email"])
+
+    assert len(user_lookups) == 2
+    assert auth._principals == {}
+
+def test_cached_principal_skips_the_lookup_until_it_expires(client, ctx, user_lookups, monkeypatch):
+    monkeypatch.setattr(auth, "PRINCIPAL_CACHE_SECONDS", 0.2)
+
+    first = _me(client, ctx["email"])
+    second = _me(client, ctx["email"])
+    assert second == first
+    assert len(user_lookups) == 1
+
+    time.sleep(0.3)
+    _me(client, ctx["email"])
+    assert len(user_lookups) == 2
+
+def test_preloaded_principals_are_served_without_a_lookup(client, ctx, user_lookups, monkeypatch):
+    monkeypatch.setattr(auth, "PRINCIPAL_PRELOAD_SECONDS", 60)
+    db = SessionLocal()
+    try:
+        loaded = preload_principals(db, 1000)
+    finally:
+        db.close()
+    assert loaded > 0
+
+    expires_at, user = auth._principals[ctx["email"]]
+    assert 59 < expires_at - time.monotonic() <= 60
+
+    assert _me(client, ctx["email"])["id"] == user.id
+    assert user_lookups == []
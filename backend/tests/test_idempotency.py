@@ -0,0 +1,163 @@
+"""Idempotency-Key handling on the create routes and in both stores."""
+import asyncio
+
+from fakeredis import FakeAsyncRedis
+from fastapi import HTTPException, Response
+import pytest
+
+import idempotency
+
+@pytest.fixture
+def memory_store(monkeypatch):
+    store = idempotency.MemoryStore(100, 60)
+    monkeypatch.setattr(idempotency, "store", store)
+    return store
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(idempotency, "get_async_redis", lambda: redis)
+    return redis
+
+@pytest.fixture
+def redis_store(monkeypatch, fake_redis):
+    store = idempotency.RedisStore(60, 30)
+    monkeypatch.setattr(idempotency, "store", store)
+    return store
+
+def _post_message(client, ctx, content, key):
+    channel_id = ctx["channel_id"]
+    return client.post(
+        f"/channels/{channel_id}/messages",
+        json={"content": content, "channelId": channel_id},
+        headers={"Idempotency-Key": key}
+    )
+
+def _message_count(client, ctx):
+    return len(client.get(f"/channels/{ctx['channel_id']}/messages").json())
+
+@pytest.mark.parametrize("store_fixture", ["memory_store", "redis_store"])
+def test_retry_replays_the_stored_response(client, ctx, request, store_fixture):
+    request.getfixturevalue(store_fixture)
+    before = _message_count(client, ctx)
+
+    first = _post_message(client, ctx, "once", f"replay-{store_fixture}")
+    second = _post_message(client, ctx, "once", f"replay-{store_fixture}")
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert idempotency.REPLAY_HEADER not in first.headers
+    assert second.headers[idempotency.REPLAY_HEADER] == "true"
+    assert _message_count(client, ctx) == before + 1
+
+def test_key_reused_with_a_different_body_is_rejected(client, ctx, memory_store):
+    assert _post_message(client, ctx, "first", "reused").status_code == 200
+
+    response = _post_message(client, ctx, "second", "reused")
+
+    assert response.status_code == 422
+
+def test_keys_are_scoped_per_route(client, ctx, memory_store):
+    assert _post_message(client, ctx, "scoped", "shared-key").status_code == 200
+
+    response = client.post(
+        f"/hubs/{ctx['hub_id']}/meetings",
+        json={"title": "Scoped", "scheduledFor": "2026-03-02T10:00:00Z", "duration": 15},
+        headers={"Idempotency-Key": "shared-key"}
+    )
+
+    assert response.status_code == 200
+    assert idempotency.REPLAY_HEADER not in response.headers
+
+def test_overlong_key_is_rejected(client, ctx, memory_store):
+    response = _post_message(client, ctx, "long", "k" * (idempotency.MAX_KEY_LENGTH + 1))
+
+    assert response.status_code == 400
+
+def test_failed_request_is_not_stored(memory_store):
+    calls = []
+
+    def failing():
+        calls.append("failing")
+        raise HTTPException(status_code=503, detail="try again")
+
+    def succeeding():
+        calls.append("succeeding")
+        return {"id": "created"}
+
+    async def scenario():
+        with pytest.raises(HTTPException):
+            await idempotency.run("retry", "scope", "fp", Response(), failing)
+        response = Response()
+        result = await idempotency.run("retry", "scope", "fp", response, succeeding)
+        return result, response
+
+    result, response = asyncio.run(scenario())
+
+    assert calls == ["failing", "succeeding"]
+    assert result == {"id": "created"}
+    assert idempotency.REPLAY_HEADER not in response.headers
+
+def test_redis_lock_is_released_only_by_its_owner(fake_redis, redis_store):
+    async def scenario():
+        token = await redis_store.claim("key")
+        assert token is not None
+        assert await redis_store.claim("key") is None
+        assert await fake_redis.ttl("idempotency-lock:key") == 30
+
+        # A stale owner must not remove a lock that someone else holds now
+        await redis_store.release("key", "someone-else")
+        assert await redis_store.claim("key") is None
+
+        await redis_store.release("key", token)
+        assert await redis_store.claim("key") is not None
+
+    asyncio.run(scenario())
+
+def test_duplicate_waits_for_the_original_on_another_worker(fake_redis, redis_store, monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 2)
+    record = {"fingerprint": "fp", "response": {"id": "original"}}
+
+    async def other_worker(token):
+        await asyncio.sleep(0.2)
+        await redis_store.set("scope:dup", record)
+        await redis_store.release("scope:dup", token)
+
+    async def scenario():
+        token = await redis_store.claim("scope:dup")
+        finishing = asyncio.ensure_future(other_worker(token))
+        response = Response()
+        result = await idempotency.run("dup", "scope", "fp", response, lambda: pytest.fail("ran twice"))
+        await finishing
+        return result, response
+
+    result, response = asyncio.run(scenario())
+
+    assert result == {"id": "original"}
+    assert response.headers[idempotency.REPLAY_HEADER] == "true"
+
+def test_duplicate_does_not_run_when_the_original_finishes_before_its_claim(fake_redis, redis_store, monkeypatch):
+    record = {"fingerprint": "fp", "response": {"id": "original"}}
+    real_get = redis_store.get
+    reads = []
+
+    # The first read misses because the original stores its response right after it
+    async def racing_get(key):
+        reads.append(key)
+        if len(reads) == 1:
+            await redis_store.set(key, record)
+            return None
+        return await real_get(key)
+
+    monkeypatch.setattr(redis_store, "get", racing_get)
+
+    async def scenario():
+        response = Response()
+        result = await idempotency.run("race", "scope", "fp", response, lambda: pytest.fail("ran twice"))
+        return result, response, await fake_redis.exists("idempotency-lock:scope:race")
+
+    result, response, lock_held = asyncio.run(scenario())
+
+    assert result == {"id": "original"}
+    assert response.headers[idempotency.REPLAY_HEADER] == "true"
+    assert lock_held == 0
@@ -0,0 +1,88 @@
+"""Expiry of the in-memory timing wheel, driven by a fake clock."""
+import asyncio
+
+import pytest
+
+from presence import MemoryPresence
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def _snapshot(tracker, hub_id):
+    async def read():
+        return sorted(await tracker.online(hub_id)), await tracker.count(hub_id)
+    return asyncio.run(read())
+
+def _heartbeat(tracker, hub_id, user_id):
+    asyncio.run(tracker.heartbeat(hub_id, user_id))
+
+@pytest.mark.parametrize("offset", [0.0, 0.5, 0.99])
+def test_member_stays_online_for_the_full_ttl(offset):
+    clock = FakeClock(1000.0 + offset)
+    tracker = MemoryPresence(ttl_seconds=2, tick_seconds=1, clock=clock)
+    _heartbeat(tracker, "hub", "alice")
+
+    clock.now += 1.999
+    assert _snapshot(tracker, "hub") == (["alice"], 1)
+
+    # Expired once the TTL has passed, at most one tick late
+    clock.now += 1.001
+    assert _snapshot(tracker, "hub") == ([], 0)
+
+def test_ttl_that_is_not_a_multiple_of_the_tick():
+    clock = FakeClock(1000.3)
+    tracker = MemoryPresence(ttl_seconds=2.5, tick_seconds=1, clock=clock)
+    _heartbeat(tracker, "hub", "alice")
+
+    clock.now += 2.49
+    assert _snapshot(tracker, "hub") == (["alice"], 1)
+
+    clock.now += 1.0
+    assert _snapshot(tracker, "hub") == ([], 0)
+
+def test_heartbeat_extends_the_ttl():
+    clock = FakeClock()
+    tracker = MemoryPresence(ttl_seconds=2, tick_seconds=1, clock=clock)
+    _heartbeat(tracker, "hub", "alice")
+    _heartbeat(tracker, "hub", "bob")
+
+    clock.now += 1.5
+    _heartbeat(tracker, "hub", "alice")
+    clock.now += 1.5
+
+    assert _snapshot(tracker, "hub") == (["alice"], 1)
+
+def test_hubs_are_tracked_separately():
+    clock = FakeClock()
+    tracker = MemoryPresence(ttl_seconds=2, tick_seconds=1, clock=clock)
+    _heartbeat(tracker, "first", "alice")
+    _heartbeat(tracker, "second", "alice")
+    _heartbeat(tracker, "second", "bob")
+
+    assert _snapshot(tracker, "first") == (["alice"], 1)
+    assert _snapshot(tracker, "second") == (["alice", "bob"], 2)
+    assert _snapshot(tracker, "unknown") == ([], 0)
+
+def test_idle_longer_than_the_wheel_expires_everyone():
+    clock = FakeClock()
+    tracker = MemoryPresence(ttl_seconds=3, tick_seconds=1, clock=clock)
+    for second in range(3):
+        _heartbeat(tracker, "hub", f"user{second}")
+        clock.now += 1
+
+    # Far more ticks than the wheel has slots
+    clock.now += 100 * len(tracker._slots)
+    assert _snapshot(tracker, "hub") == ([], 0)
+    assert tracker._online == {}
+    assert all(not slot for slot in tracker._slots)
+
+    # The wheel keeps working after the jump
+    _heartbeat(tracker, "hub", "late")
+    clock.now += 2.9
+    assert _snapshot(tracker, "hub") == (["late"], 1)
+    clock.now += 1.1
+    assert _snapshot(tracker, "hub") == ([], 0)
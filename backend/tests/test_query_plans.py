@@ -0,0 +1,102 @@
+"""Every endpoint's queries must be answered from an index.
+
+Each case calls the real route through the app, records the SQL it sends
+with a `before_cursor_execute` hook and EXPLAINs every statement that
+reads rows. On PostgreSQL sequential scans are disabled for the EXPLAIN,
+so a Seq Scan in the plan means no index can serve the query at all.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import json
+
+from sqlalchemy import event
+import pytest
+
+from database import engine
+
+# (method, path, JSON body built from the seed context, expected status)
+ENDPOINTS = [
+    ("POST", "/auth/register", lambda ctx: {"email": ctx["email"], "name": "Taken", "password": "secret"}, 400),
+    ("POST", "/auth/login", lambda ctx: {"email": "nobody@example.com", "password": "secret"}, 401),
+    ("GET", "/users/me", None, 200),
+    ("POST", "/hubs", lambda ctx: {
+        "name": "New hub",
+        "type": "team",
+        "creator": ctx["email"],
+        "members": [{"email": ctx["other_email"], "role": "Employee"}]
+    }, 200),
+    ("GET", "/hubs", None, 200),
+    ("GET", "/hubs/{hub_id}", None, 200),
+    ("POST", "/hubs/{hub_id}/teams", lambda ctx: {
+        "name": "New team",
+        "department": "Eng",
+        "leader": ctx["user_id"],
+        "assistant": ctx["other_user_id"],
+        "members": [ctx["user_id"], ctx["other_user_id"]]
+    }, 200),
+    ("POST", "/channels/{channel_id}/messages", lambda ctx: {"content": "hi", "channelId": ctx["channel_id"]}, 200),
+    ("GET", "/channels/{channel_id}/messages", None, 200),
+    ("POST", "/hubs/{hub_id}/meetings", lambda ctx: {
+        "title": "Planning",
+        "participants": [ctx["user_id"], ctx["other_user_id"]],
+        "scheduledFor": (datetime.now(timezone.utc) + timedelta(days=1)).isoformat(),
+        "duration": 30
+    }, 200),
+    ("GET", "/hubs/{hub_id}/meetings", None, 200),
+    ("GET", "/hubs/{hub_id}/stats", None, 200),
+    ("POST", "/hubs/{hub_id}/presence/heartbeat", None, 200),
+    ("GET", "/hubs/{hub_id}/presence", None, 200),
+]
+
+@contextmanager
+def captured_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def _postgres_seq_scans(node):
+    found = [node["Relation Name"]] if node["Node Type"] == "Seq Scan" else []
+    for child in node.get("Plans", []):
+        found += _postgres_seq_scans(child)
+    return found
+
+def sequential_scans(connection, statement, parameters):
+    """Return the tables `statement` reads without an index."""
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return _postgres_seq_scans(plan[0]["Plan"])
+
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    return [row[-1][len("SCAN "):] for row in rows if row[-1].startswith("SCAN ") and row[-1] != "SCAN CONSTANT ROW"]
+
+@pytest.mark.parametrize(
+    "method, path, body, expected_status",
+    ENDPOINTS,
+    ids=[f"{method} {path}" for method, path, _, _ in ENDPOINTS]
+)
+def test_endpoint_queries_use_indexes(client, ctx, method, path, body, expected_status):
+    with captured_statements() as statements:
+        response = client.request(method, path.format(**ctx), json=body(ctx) if body else None)
+
+    assert response.status_code == expected_status, response.text
+    assert statements, "no queries were captured"
+
+    problems = []
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            scans = sequential_scans(connection, statement, parameters)
+            if scans:
+                problems.append(f"sequential scan on {', '.join(scans)}: {' '.join(statement.split())}")
+
+    assert not problems, "\n".join(problems)
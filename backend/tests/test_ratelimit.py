@@ -0,0 +1,152 @@
+"""Token buckets and admission control of RateLimitMiddleware, on a small app with low limits."""
+import asyncio
+
+from fakeredis import FakeAsyncRedis
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+import httpx
+import pytest
+
+from auth import create_access_token
+import ratelimit
+
+async def fast(request):
+    return PlainTextResponse("ok")
+
+async def slow(request):
+    await asyncio.sleep(0.3)
+    return PlainTextResponse("ok")
+
+@pytest.fixture
+def make_client(monkeypatch):
+    def make(**settings):
+        defaults = {
+            "RATE_LIMIT_BACKEND": "memory",
+            "RATE_LIMIT_PER_MINUTE": 60,
+            "RATE_LIMIT_BURST": 100,
+            "AUTH_RATE_LIMIT_PER_MINUTE": 60,
+            "AUTH_RATE_LIMIT_BURST": 100,
+        }
+        for name, value in {**defaults, **settings}.items():
+            monkeypatch.setattr(ratelimit, name, value)
+
+        app = Starlette(routes=[
+            Route("/items", fast),
+            Route("/slow", slow),
+            Route("/auth/login", fast, methods=["POST"]),
+        ])
+        # Middleware is built on the first request, after the settings above
+        app.add_middleware(ratelimit.RateLimitMiddleware)
+
+        def client(ip="10.0.0.1"):
+            transport = httpx.ASGITransport(app=app, client=(ip, 1234))
+            return httpx.AsyncClient(transport=transport, base_url="http://test")
+        return client
+    return make
+
+def _bearer(email):
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': email})}"}
+
+def test_exhausted_bucket_gets_429_with_retry_after(make_client):
+    client = make_client(RATE_LIMIT_BURST=2)
+
+    async def scenario():
+        async with client() as http:
+            return [await http.get("/items", headers=_bearer("a@example.com")) for _ in range(3)]
+
+    responses = asyncio.run(scenario())
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[-1].headers["Retry-After"] == "1"
+    assert responses[-1].json() == {"detail": "Too many requests"}
+
+def test_buckets_are_per_user_and_route(make_client):
+    client = make_client(RATE_LIMIT_BURST=1)
+
+    async def scenario():
+        async with client() as http:
+            return [
+                (await http.get("/items", headers=_bearer("a@example.com"))).status_code,
+                (await http.get("/items", headers=_bearer("a@example.com"))).status_code,
+                (await http.get("/items", headers=_bearer("b@example.com"))).status_code,
+                (await http.get("/slow", headers=_bearer("a@example.com"))).status_code,
+            ]
+
+    assert asyncio.run(scenario()) == [200, 429, 200, 200]
+
+def test_auth_routes_are_limited_per_client_ip(make_client):
+    client = make_client(AUTH_RATE_LIMIT_BURST=2)
+
+    async def scenario():
+        async with client("10.0.0.1") as first, client("10.0.0.2") as second:
+            # Changing the token does not give a new bucket on /auth/*
+            statuses = [
+                (await first.post("/auth/login", headers=_bearer(f"user{i}@example.com"))).status_code
+                for i in range(3)
+            ]
+            statuses.append((await second.post("/auth/login")).status_code)
+            return statuses
+
+    assert asyncio.run(scenario()) == [200, 200, 429, 200]
+
+def test_memory_buckets_evict_the_least_recently_used():
+    buckets = ratelimit.MemoryBuckets(max_buckets=2)
+
+    async def scenario():
+        allowed = []
+        for key in ["a", "b", "a", "c"]:
+            allowed.append((await buckets.take(key, 0.001, 1))[0])
+        # "b" was least recently used when "c" arrived, so it starts full again
+        allowed.append((await buckets.take("b", 0.001, 1))[0])
+        allowed.append((await buckets.take("c", 0.001, 1))[0])
+        return allowed
+
+    assert asyncio.run(scenario()) == [True, True, False, True, True, False]
+    assert len(buckets._buckets) == 2
+
+def test_redis_buckets_run_the_take_script(monkeypatch):
+    redis = FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(ratelimit, "get_async_redis", lambda: redis)
+    # Two instances stand in for two workers sharing one bucket
+    first, second = ratelimit.RedisBuckets(), ratelimit.RedisBuckets()
+
+    async def scenario():
+        results = [await first.take("key", 1.0, 2), await second.take("key", 1.0, 2), await first.take("key", 1.0, 2)]
+        return results, await redis.ttl("ratelimit:key")
+
+    results, ttl = asyncio.run(scenario())
+
+    assert [allowed for allowed, _ in results] == [True, True, False]
+    assert 0 < results[-1][1] <= 1
+    assert ttl == 3
+
+def test_requests_beyond_the_queue_are_shed(make_client, monkeypatch):
+    monkeypatch.setattr(ratelimit, "MAX_IN_FLIGHT", 1)
+    monkeypatch.setattr(ratelimit, "MAX_QUEUED", 1)
+    client = make_client()
+
+    async def scenario():
+        async with client() as http:
+            return await asyncio.gather(*[http.get("/slow") for _ in range(3)])
+
+    responses = asyncio.run(scenario())
+
+    # One runs, one waits for its slot, the third finds the queue full
+    assert [response.status_code for response in responses] == [200, 200, 503]
+    assert responses[2].headers["Retry-After"] == "1"
+    assert responses[2].json() == {"detail": "Server is overloaded"}
+
+def test_queued_request_times_out(make_client, monkeypatch):
+    monkeypatch.setattr(ratelimit, "MAX_IN_FLIGHT", 1)
+    monkeypatch.setattr(ratelimit, "MAX_QUEUED", 5)
+    monkeypatch.setattr(ratelimit, "QUEUE_TIMEOUT_SECONDS", 0.05)
+    client = make_client()
+
+    async def scenario():
+        async with client() as http:
+            return await asyncio.gather(http.get("/slow"), http.get("/slow"))
+
+    responses = asyncio.run(scenario())
+
+    assert [response.status_code for response in responses] == [200, 503]
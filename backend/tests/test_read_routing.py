@@ -0,0 +1,68 @@
+"""Read-only routes, including their user lookup, must run on a replica."""
+import os
+
+from sqlalchemy import create_engine, event
+import pytest
+
+from auth import create_access_token
+import database
+
+READ_ROUTES = [
+    "/users/me",
+    "/hubs",
+    "/hubs/{hub_id}",
+    "/channels/{channel_id}/messages",
+    "/hubs/{hub_id}/meetings",
+    "/hubs/{hub_id}/stats",
+    "/hubs/{hub_id}/presence",
+]
+
+@pytest.fixture
+def replica(monkeypatch):
+    # A second engine on the same database stands in for a replica
+    replica_engine = create_engine(os.environ["DATABASE_URL"])
+    monkeypatch.setattr(database, "replica_engines", [replica_engine])
+    yield replica_engine
+    replica_engine.dispose()
+
+def _count_statements(target):
+    counter = {"statements": 0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["statements"] += 1
+
+    event.listen(target, "before_cursor_execute", before_cursor_execute)
+    return counter, lambda: event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+def _headers(email):
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': email})}"}
+
+@pytest.mark.parametrize("path", READ_ROUTES)
+def test_read_routes_do_not_touch_the_primary(client, ctx, replica, path):
+    primary, stop_primary = _count_statements(database.engine)
+    secondary, stop_secondary = _count_statements(replica)
+    try:
+        # This user never writes, so its reads are not pinned to the primary
+        response = client.get(path.format(**ctx), headers=_headers(ctx["other_email"]))
+    finally:
+        stop_primary()
+        stop_secondary()
+
+    assert response.status_code == 200, response.text
+    assert primary["statements"] == 0
+    assert secondary["statements"] > 0
+
+def test_reads_after_a_write_stay_on_the_primary(client, ctx, replica):
+    headers = _headers(ctx["email"])
+    path = f"/channels/{ctx['channel_id']}/messages"
+    response = client.post(path, json={"content": "sticky", "channelId": ctx["channel_id"]}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    secondary, stop_secondary = _count_statements(replica)
+    try:
+        response = client.get(path, headers=headers)
+    finally:
+        stop_secondary()
+
+    assert response.status_code == 200, response.text
+    assert secondary["statements"] == 0
@@ -0,0 +1,42 @@
+"""Live rollup updates must agree with a rebuild from `stats.py backfill`."""
+from database import SessionLocal
+import stats
+
+def _stats(client, hub_id, start, end):
+    params = {key: value for key, value in {"from": start, "to": end}.items() if value}
+    response = client.get(f"/hubs/{hub_id}/stats", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def _backfill(hub_id):
+    db = SessionLocal()
+    try:
+        stats.backfill_all(db, hub_id)
+    finally:
+        db.close()
+
+def test_live_rollups_match_backfill(client, ctx):
+    hub = client.post("/hubs", json={"name": "Rollups", "type": "team", "creator": ctx["email"]}).json()
+    channel_id = hub["channels"][0]["id"]
+
+    for content in ("one", "two"):
+        response = client.post(f"/channels/{channel_id}/messages", json={"content": content, "channelId": channel_id})
+        assert response.status_code == 200, response.text
+
+    # Sunday evening in UTC-5 is Monday in UTC, so the day and the week both change
+    response = client.post(f"/hubs/{hub['id']}/meetings", json={
+        "title": "Late",
+        "scheduledFor": "2026-03-15T23:30:00-05:00",
+        "duration": 45
+    })
+    assert response.status_code == 200, response.text
+
+    messages_live = _stats(client, hub["id"], None, None)
+    meetings_live = _stats(client, hub["id"], "2026-03-01", "2026-03-31")
+    assert meetings_live["meetingsByWeek"] == [{"weekStart": "2026-03-16", "meetings": 1, "minutes": 45}]
+    assert sum(day["messages"] for day in messages_live["days"]) == 2
+
+    _backfill(hub["id"])
+
+    assert _stats(client, hub["id"], None, None) == messages_live
+    assert _stats(client, hub["id"], "2026-03-01", "2026-03-31") == meetings_live
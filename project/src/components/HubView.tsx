@@ -73,6 +73,32 @@ const HubView: React.FC<HubViewProps> = ({ hub }) => {
   // Show all members list
   const [showMembersList, setShowMembersList] = useState(false);
 
+  // Presence: heartbeat while the hub is open; each response carries who is online
+  const [onlineUserIds, setOnlineUserIds] = useState<string[]>([]);
+
+  useEffect(() => {
+    let cancelled = false;
+
+    const sendHeartbeat = async () => {
+      try {
+        const presence = await apiClient.sendPresenceHeartbeat(hub.id);
+        if (!cancelled) {
+          setOnlineUserIds(presence.online);
+        }
+      } catch (error) {
+        console.error('Failed to send presence heartbeat:', error);
+      }
+    };
+
+    sendHeartbeat();
+    const interval = setInterval(sendHeartbeat, 30000);
+
+    return () => {
+      cancelled = true;
+      clearInterval(interval);
+    };
+  }, [hub.id]);
+
   if (!user) return null;
 
   const userMember = hub.members.find(m => m.userId === user.id);
@@ -471,6 +497,7 @@ const HubView: React.FC<HubViewProps> = ({ hub }) => {
                 joined_at: m.joinedAt
               }))} 
               currentUserRole={userRole} 
+              onlineUserIds={onlineUserIds}
             />
           </div>
         </Modal>
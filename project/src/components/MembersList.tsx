@@ -13,9 +13,12 @@ interface Member {
 interface MembersListProps {
   members: Member[];
   currentUserRole: string;
+  onlineUserIds?: string[];
 }
 
-const MembersList: React.FC<MembersListProps> = ({ members, currentUserRole }) => {
+const MembersList: React.FC<MembersListProps> = ({ members, currentUserRole, onlineUserIds = [] }) => {
+  const onlineIds = new Set(onlineUserIds);
+
   const getRoleIcon = (role: string) => {
     switch (role) {
       case 'CEO':
@@ -75,6 +78,10 @@ const MembersList: React.FC<MembersListProps> = ({ members, currentUserRole }) =
         <h3 className="text-lg font-semibold text-black">
           Members ({members.length})
         </h3>
+        <span className="flex items-center text-sm text-gray-600">
+          <span className="w-2 h-2 bg-green-500 rounded-full mr-2" />
+          {onlineIds.size} online
+        </span>
       </div>
 
       {/* Role Summary */}
@@ -111,8 +118,14 @@ const MembersList: React.FC<MembersListProps> = ({ members, currentUserRole }) =
                   >
                     <div className="flex items-center justify-between">
                       <div className="flex items-center space-x-3">
-                        <div className="w-10 h-10 bg-gray-100 rounded-full flex items-center justify-center">
+                        <div className="relative w-10 h-10 bg-gray-100 rounded-full flex items-center justify-center">
                           <User className="text-gray-600" size={20} />
+                          {onlineIds.has(member.user_id) && (
+                            <span
+                              className="absolute bottom-0 right-0 w-3 h-3 bg-green-500 border-2 border-white rounded-full"
+                              title="Online"
+                            />
+                          )}
                         </div>
                         <div>
                           <h4 className="font-medium text-black">{member.name}</h4>
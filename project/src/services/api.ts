@@ -41,8 +41,11 @@ class ApiClient {
       },
     };
 
+    // Only requests carrying an Idempotency-Key are safe to resend after a network error
+    const idempotent = Boolean((options.headers as Record<string, string> | undefined)?.['Idempotency-Key']);
+
     try {
-      const response = await fetch(url, config);
+      const response = await this.fetchWithRetry(url, config, idempotent ? 2 : 0);
       
       if (!response.ok) {
         throw new Error(`API request failed: ${response.status}`);
@@ -55,6 +58,24 @@ class ApiClient {
     }
   }
 
+  private async fetchWithRetry(url: string, config: RequestInit, retries: number): Promise<Response> {
+    for (let attempt = 0; ; attempt++) {
+      try {
+        return await fetch(url, config);
+      } catch (error) {
+        if (attempt >= retries) {
+          throw error;
+        }
+        await new Promise(resolve => setTimeout(resolve, 250 * (attempt + 1)));
+      }
+    }
+  }
+
+  // Retries of the same call reuse this key, so the backend executes it only once
+  private idempotencyHeaders(): HeadersInit {
+    return { 'Idempotency-Key': crypto.randomUUID() };
+  }
+
   // Authentication
   async register(userData: { email: string; name: string; password: string }) {
     const response = await this.request<{ access_token: string; token_type: string; user: any }>('/auth/register', {
@@ -84,6 +105,7 @@ class ApiClient {
   async createHub(hubData: any) {
     return this.request<any>('/hubs', {
       method: 'POST',
+      headers: this.idempotencyHeaders(),
       body: JSON.stringify(hubData),
     });
   }
@@ -100,6 +122,7 @@ class ApiClient {
   async createTeam(hubId: string, teamData: any) {
     return this.request<any>(`/hubs/${hubId}/teams`, {
       method: 'POST',
+      headers: this.idempotencyHeaders(),
       body: JSON.stringify(teamData),
     });
   }
@@ -108,6 +131,7 @@ class ApiClient {
   async sendMessage(channelId: string, content: string) {
     return this.request<any>(`/channels/${channelId}/messages`, {
       method: 'POST',
+      headers: this.idempotencyHeaders(),
       body: JSON.stringify({ content, channelId }),
     });
   }
@@ -120,6 +144,7 @@ class ApiClient {
   async createMeeting(hubId: string, meetingData: any) {
     return this.request<any>(`/hubs/${hubId}/meetings`, {
       method: 'POST',
+      headers: this.idempotencyHeaders(),
       body: JSON.stringify(meetingData),
     });
   }
@@ -128,6 +153,17 @@ class ApiClient {
     return this.request<any[]>(`/hubs/${hubId}/meetings`);
   }
 
+  // Presence
+  async sendPresenceHeartbeat(hubId: string) {
+    return this.request<{ hubId: string; online: string[]; count: number }>(`/hubs/${hubId}/presence/heartbeat`, {
+      method: 'POST',
+    });
+  }
+
+  async getHubPresence(hubId: string) {
+    return this.request<{ hubId: string; online: string[]; count: number }>(`/hubs/${hubId}/presence`);
+  }
+
   // Organization/Hub Member Management
   async addHubMember(hubId: string, email: string, role: string) {
     return this.request<any>(`/api/organizations/${hubId}/members`, {